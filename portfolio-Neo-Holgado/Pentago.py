@@ -3,15 +3,265 @@
 # Date: 08/08/2024
 # Description: Pentago game simulator
 
+import functools
+import random
+import types
+
+
+def build_win_masks():
+    """
+    Builds a bitmask for every line of five positions on the 6x6 board
+    :return: Tuple of bitmasks with bit index row * 6 + column
+    """
+    win_masks = []
+    directions = ((0, 1), (1, 0), (1, 1), (1, -1))     # Row, column, diagonal, anti-diagonal
+    for row in range(6):
+        for column in range(6):
+            for row_step, column_step in directions:
+                end_row = row + 4 * row_step
+                end_column = column + 4 * column_step
+                if 0 <= end_row < 6 and 0 <= end_column < 6:
+                    mask = 0
+                    for step in range(5):
+                        mask |= 1 << ((row + step * row_step) * 6 + column + step * column_step)
+                    win_masks.append(mask)
+    return tuple(win_masks)
+
+
+# Bits of all 36 positions, the occupied bits of a full board
+FULL_MASK = (1 << 36) - 1
+
+# All 32 lines of five on the board
+WIN_MASKS = build_win_masks()
+
+# Indices (row, column) of each position string, e.g. 'a0' or 'A0' to (0, 0)
+POSITIONS = {
+    f"{letter}{column_index}": (row_index, column_index)
+    for row_index, row_letter in enumerate('abcdef')
+    for letter in (row_letter, row_letter.upper())
+    for column_index in range(6)
+}
+
+# Lines of five passing through each position, indexed by row * 6 + column
+LINES_THROUGH = tuple(
+    tuple(mask for mask in WIN_MASKS if mask & (1 << index)) for index in range(36)
+)
+
+# Main board corner position of each sub-board
+SUB_BOARD_CORNERS = {
+    1: (0, 0),
+    2: (0, 3),
+    3: (3, 0),
+    4: (3, 3)
+}
+
+
+def build_zobrist_keys():
+    """
+    Builds a random 64-bit key for each marble color on each position, for hashing the board
+    :return: Tuple of (white key, black key) pairs indexed by row * 6 + column
+    """
+    generator = random.Random(0xBEEF)      # Fixed seed so a position hashes the same in every run
+    return tuple((generator.getrandbits(64), generator.getrandbits(64)) for _ in range(36))
+
+
+# Zobrist keys, the hash of a board is the XOR of the keys of all its marbles
+ZOBRIST_KEYS = build_zobrist_keys()
+
+
+def build_sub_board_rotations():
+    """
+    Builds the bit permutation for rotating each sub-board clockwise and counterclockwise
+    :return: Dictionary of (sub_board, rotation) to a tuple of
+             (source bit, destination bit, white hash change, black hash change) for each position
+    """
+    def move(source, destination):
+        """
+        Describes moving a marble from the source index to the destination index
+        """
+        white_change = ZOBRIST_KEYS[source][0] ^ ZOBRIST_KEYS[destination][0]
+        black_change = ZOBRIST_KEYS[source][1] ^ ZOBRIST_KEYS[destination][1]
+        return 1 << source, 1 << destination, white_change, black_change
+
+    rotations = {}
+    for sub_board_num, (starting_row, starting_column) in SUB_BOARD_CORNERS.items():
+        clockwise = []
+        counterclockwise = []
+        for row in range(3):
+            for column in range(3):
+                source = (starting_row + row) * 6 + starting_column + column
+                # Clockwise moves (row, column) to (column, 2 - row)
+                clockwise.append(move(source, (starting_row + column) * 6 + starting_column + 2 - row))
+                # Counterclockwise moves (row, column) to (2 - column, row)
+                counterclockwise.append(move(source, (starting_row + 2 - column) * 6 + starting_column + row))
+        rotations[(sub_board_num, 'C')] = tuple(clockwise)
+        rotations[(sub_board_num, 'A')] = tuple(counterclockwise)
+    return rotations
+
+
+# Bits covered by each sub-board
+SUB_BOARD_MASKS = {
+    sub_board_num: sum(
+        1 << (row * 6 + column)
+        for row in range(starting_row, starting_row + 3)
+        for column in range(starting_column, starting_column + 3)
+    )
+    for sub_board_num, (starting_row, starting_column) in SUB_BOARD_CORNERS.items()
+}
+
+# Bit permutation of each sub-board rotation
+SUB_BOARD_ROTATIONS = build_sub_board_rotations()
+
+# The same permutations as (source bit, destination bit) pairs for the step() kernel,
+# indexed by (sub_board - 1) * 2 + rotation with rotation 0 for clockwise and 1 for counterclockwise
+KERNEL_ROTATIONS = tuple(
+    tuple((source, destination) for source, destination, _, _ in SUB_BOARD_ROTATIONS[(sub_board_num, rotation)])
+    for sub_board_num in SUB_BOARD_CORNERS
+    for rotation in ('C', 'A')
+)
+
+# Lines of five passing through any position of each sub-board
+SUB_BOARD_LINES = {
+    sub_board_num: tuple(frozenset(
+        mask
+        for row in range(starting_row, starting_row + 3)
+        for column in range(starting_column, starting_column + 3)
+        for mask in LINES_THROUGH[row * 6 + column]
+    ))
+    for sub_board_num, (starting_row, starting_column) in SUB_BOARD_CORNERS.items()
+}
+
+# Board cell values used by get_board() and the marble colors
+EMPTY = '.'
+WHITE = 'W'
+BLACK = 'B'
+
+# Marble colors, indexed by side 0 for white and 1 for black
+PLAYERS = (WHITE, BLACK)
+
+# Full color name of each marble, used in the game state
+COLOR_NAMES = {WHITE: 'WHITE', BLACK: 'BLACK'}
+
+# Game states returned by step(), indexed by state number
+GAME_STATES = ('UNFINISHED', 'WHITE_WON', 'BLACK_WON', 'DRAW')
+
+
+def has_five_in_a_row(bits):
+    """
+    Checks a bitboard against every line of five
+    :param bits: Bitboard of one player's marbles
+    :return: True if there are 5 marbles in a row, else False
+    """
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def rotate_bits(bits, sub_board, rotation):
+    """
+    Rotates one sub-board of a bitboard by 90 degrees
+    :param bits: Bitboard of one player's marbles
+    :param sub_board: Integer representing the sub-board to be rotated (1, 2, 3, 4)
+    :param rotation: Integer 0 for clockwise or 1 for counterclockwise rotation
+    :return: The rotated bitboard
+    """
+    # Clear the sub-board, then set each marble at its rotated position
+    moves = KERNEL_ROTATIONS[(sub_board - 1) * 2 + rotation]
+    rotated = bits
+    for source, destination in moves:
+        rotated &= ~source
+    for source, destination in moves:
+        if bits & source:
+            rotated |= destination
+    return rotated
+
+
+def step(white, black, side, move_index, sub_board, rotation):
+    """
+    Plays one move on a pair of bitboards, for search and self-play loops.
+    The move is not validated, the game must be unfinished and the position at move_index empty.
+    :param white: Bitboard of the white marbles
+    :param black: Bitboard of the black marbles
+    :param side: Integer 0 for white or 1 for black
+    :param move_index: Bit index row * 6 + column of the marble to place
+    :param sub_board: Integer representing the sub-board to be rotated (1, 2, 3, 4)
+    :param rotation: Integer 0 for clockwise or 1 for counterclockwise rotation
+    :return: Tuple (white, black, state) where state indexes GAME_STATES
+    """
+    # Place the marble and check for a win before rotating
+    if side == 0:
+        white |= 1 << move_index
+        if has_five_in_a_row(white):
+            return white, black, 1
+    else:
+        black |= 1 << move_index
+        if has_five_in_a_row(black):
+            return white, black, 2
+
+    # Rotate the sub-board on both bitboards
+    rotated_white = rotate_bits(white, sub_board, rotation)
+    rotated_black = rotate_bits(black, sub_board, rotation)
+
+    # Check for wins after rotating, a color without moved marbles cannot have a new line
+    white_win = rotated_white != white and has_five_in_a_row(rotated_white)
+    black_win = rotated_black != black and has_five_in_a_row(rotated_black)
+    white = rotated_white
+    black = rotated_black
+
+    # Check for both players winning, then for a full board
+    if white_win and black_win:
+        return white, black, 3
+    if white_win:
+        return white, black, 1
+    if black_win:
+        return white, black, 2
+    if white | black == FULL_MASK:
+        return white, black, 3
+    return white, black, 0
+
+
+@functools.lru_cache(maxsize=None)
+def load_step_kernel():
+    """
+    Loads the fastest available step(), only search and self-play code pays for the import and compilation.
+    Uses the compiled Cython kernel when it has been built (see setup.py), otherwise compiles the bitboard
+    kernel with numba when it is installed, otherwise returns the pure Python step().
+    The kernel is for external search code only, the Pentago class never calls it, also when pentago_core
+    is built. make_move() spends about a third of its ~4us per move in GameBoard, and delegating that to
+    the kernel would need a second make_move() path plus a bit-by-bit resync of the Zobrist hash.
+    :return: The step function
+    """
+    try:
+        from pentago_core import step as compiled_step
+        return compiled_step
+    except ImportError:
+        pass
+
+    try:
+        from numba import njit
+    except ImportError:
+        return step
+
+    # Compile copies of the kernel functions that look up each other in their own namespace,
+    # so the module functions stay pure Python
+    kernel_globals = {'WIN_MASKS': WIN_MASKS, 'KERNEL_ROTATIONS': KERNEL_ROTATIONS, 'FULL_MASK': FULL_MASK}
+    for function in (has_five_in_a_row, rotate_bits, step):
+        kernel_function = types.FunctionType(function.__code__, kernel_globals, function.__name__)
+        kernel_globals[function.__name__] = njit(cache=True)(kernel_function)
+    return kernel_globals['step']
+
+
 class Pentago:
     """
     Represents the game of Pentago.
     Manages game setup, game state, and game logic
     """
+    __slots__ = ('_board', '_side', '_game_state', '_game_log')
+
     def __init__(self):
         self._board = GameBoard()
-        self._current_player = None
-        self._opponent = None
+        self._side = None       # Side to move, 0 for white and 1 for black, None before the first move
         self._game_state = 'UNFINISHED'
         self._game_log = GameLog()
 
@@ -20,28 +270,38 @@ class Pentago:
         Retrieves the current player
         :return: The current player
         """
-        return self._current_player
+        if self._side is None:
+            return None
+        return PLAYERS[self._side]
 
     def set_current_player(self, marble_color: str) -> None:
         """
         Sets the current player's marble color as the current player
-        :param marble_color: Marble color
+        :param marble_color: Marble color 'W' or 'B', or None before the first move
         """
-        self._current_player = marble_color
+        if marble_color is None:
+            self._side = None
+        else:
+            self._side = PLAYERS.index(marble_color)
 
     def get_opponent(self) -> str:
         """
         Retrieves the opponent on current turn
         :return: Opponent of current turn
         """
-        return self._opponent
+        if self._side is None:
+            return None
+        return PLAYERS[self._side ^ 1]
 
     def set_opponent(self, opponent: str) -> None:
         """
-        Sets the opponent's marble color
-        :param opponent: Current turn's opponent
+        Sets the opponent's marble color, the current player becomes the other color
+        :param opponent: Current turn's opponent 'W' or 'B', or None before the first move
         """
-        self._opponent = opponent
+        if opponent is None:
+            self._side = None
+        else:
+            self._side = PLAYERS.index(opponent) ^ 1
 
     def get_game_state(self) -> str:
         """
@@ -71,12 +331,7 @@ class Pentago:
         :param position: String position
         :return: Tuple of indices (row, column)
         """
-        letter_conversion = {'a': 0, 'b': 1, 'c': 2, 'd': 3, 'e': 4, 'f': 5}
-        row_index = letter_conversion[position[0].lower()]      # Convert 'a' to 0 etc.
-        column_index = int(position[1])                         # Convert '1' to 0 etc.
-
-        indices = (row_index, column_index)
-        return indices
+        return POSITIONS[position]
 
     def make_move(self, marble_color: str, position: str, sub_board: str, rotation: str) -> bool:
         """
@@ -90,63 +345,54 @@ class Pentago:
         # Convert the position to correct indices
         position = self.convert_position(position)
 
-        # Convert marble color to marble and update current player
-        marble_color = "W" if marble_color.upper() == "WHITE" else "B"
-        self._current_player = marble_color
+        # Convert marble color to side and marble
+        side = 0 if marble_color.upper() == "WHITE" else 1
+        marble_color = PLAYERS[side]
 
-        # If the move is valid
-        player = self.get_current_player()
-        validation_result = self.is_valid_move(position, player)
+        # If the move is valid, update current player
+        validation_result = self.is_valid_move(position, marble_color)
         if validation_result is not True:
             return validation_result
+        self._side = side
 
         # Place a marble on the board
         self._board.update_game_board(marble_color, position)
 
-        # Check for a win before rotating
-        game_state = self._board.check_end_conditions(marble_color)
-        if game_state != "UNFINISHED":
-            self.set_game_state(game_state)
+        # Check for a win before rotating, only lines through the new marble can be complete
+        if self._board.check_win_at(marble_color, position):
+            self._game_state = f"{COLOR_NAMES[marble_color]}_WON"
             return True
 
         # Rotate the sub-board
-        self._board.rotate_sub_board(sub_board, rotation)
-
-        # Update the main board from sub-boards
-        self._board.update_board_from_sub_boards()
+        moved = self._board.rotate_sub_board(sub_board, rotation)
 
-        # Define player win
-        current_player_win = self._board.check_end_conditions(marble_color)
+        # No line was complete before rotating, so a color can only win if the rotation moved its marbles,
+        # and then only on lines through the rotated sub-board
+        current_player_win = moved[side] and self._board.check_win_in_sub_board(marble_color, sub_board)
 
         # Define the opponents color
-        opponent_color = "W" if marble_color == "B" else "B"
-        self.set_opponent(opponent_color)
+        opponent_color = PLAYERS[side ^ 1]
 
         # Define opponent win
-        opponent_win = self._board.check_end_conditions(opponent_color)
-
-        # Check for wins after rotating and convert colors
-        convert_color = {'W': 'WHITE', 'B': 'BLACK'}
-        current_player_color = convert_color[self.get_current_player()]
-        current_opponent_color = convert_color[self.get_opponent()]
+        opponent_win = moved[side ^ 1] and self._board.check_win_in_sub_board(opponent_color, sub_board)
 
         # Check for both players winning after rotation
         if current_player_win:
             if opponent_win:
-                self.set_game_state("DRAW")
+                self._game_state = "DRAW"
                 return True
             else:
-                self.set_game_state(f"{current_player_color}_WON")
+                self._game_state = f"{COLOR_NAMES[marble_color]}_WON"
                 return True
 
         # Check if opponent won
         if opponent_win:
-            self.set_game_state(f"{current_opponent_color}_WON")
+            self._game_state = f"{COLOR_NAMES[opponent_color]}_WON"
             return True
 
         # Check if the board is full after the move
-        if self.is_board_full():
-            self.set_game_state("DRAW")
+        if self._board.is_full():
+            self._game_state = "DRAW"
             return True
 
         # If there is no win or draw, switch the player and log the move
@@ -163,19 +409,15 @@ class Pentago:
         :return: True if the move is valid, else False
         """
         # Check if the game is already finished
-        if self.get_game_state() != 'UNFINISHED':
+        if self._game_state != 'UNFINISHED':
             return "game is finished"
 
-        # Check if it's the correct players turn
-        if player == self.get_opponent():
+        # Check if it's the correct players turn, any player may make the first move
+        if self._side is not None and player == PLAYERS[self._side ^ 1]:
             return "not this player's turn"
 
-        # Check if a marble is already in the current position
-        # Find the row and column from position
-        row, column = position
-
         # Checks if the cell at position is empty
-        if self._board.get_board()[row][column] != '.':
+        if not self._board.is_empty(position):
             return "position is not empty"
 
         # If checks pass, then valid move
@@ -186,12 +428,33 @@ class Pentago:
         Switches the current player and the opponent
         """
         # Switches current player and opponent
-        if self.get_current_player() == 'B':
-            self.set_current_player('W')
-            self.set_opponent('B')
-        elif self.get_current_player() == 'W':
-            self.set_current_player('B')
-            self.set_opponent('W')
+        self._side ^= 1
+
+    def get_bitboards(self) -> tuple:
+        """
+        Retrieves the white and black bitboards, e.g. as the starting point for step()
+        :return: Tuple (white, black) of bitboards with bit index row * 6 + column
+        """
+        return self._board.get_bitboards()
+
+    def clone(self) -> 'Pentago':
+        """
+        Copies the game, e.g. for search code that explores moves without changing this game
+        :return: New Pentago with the same board, turn, game state and a copy of the game log
+        """
+        game = type(self).__new__(type(self))
+        game._board = self._board.clone()
+        game._side = self._side
+        game._game_state = self._game_state
+        game._game_log = self._game_log.clone()
+        return game
+
+    def get_zobrist_hash(self) -> int:
+        """
+        Retrieves the Zobrist hash of the board, e.g. as a transposition table key for search code
+        :return: 64-bit integer hash
+        """
+        return self._board.get_zobrist_hash()
 
     def print_board(self) -> None:
         """
@@ -209,38 +472,76 @@ class GameBoard:
     Displays the board to the user and updates the board state.
     Communicates marble positions and board changes to Pentago class.
     """
+    __slots__ = ('_white', '_black', '_occupied', '_zobrist')
+
     def __init__(self):
-        # Initialize the 6x6 game board as a 2D list
-        self._game_board = [
-            ['.', '.', '.', '.', '.', '.'],
-            ['.', '.', '.', '.', '.', '.'],
-            ['.', '.', '.', '.', '.', '.'],
-            ['.', '.', '.', '.', '.', '.'],
-            ['.', '.', '.', '.', '.', '.'],
-            ['.', '.', '.', '.', '.', '.']
-        ]
-
-        # Initialize 4 3x3 sub-boards
-        self._sub_boards = {
-            1: SubBoard(self._game_board, 0, 0),
-            2: SubBoard(self._game_board, 0, 3),
-            3: SubBoard(self._game_board, 3, 0),
-            4: SubBoard(self._game_board, 3, 3)
-        }
+        # Store each color as a 36-bit bitboard, bit index is row * 6 + column
+        self._white = 0
+        self._black = 0
+        self._occupied = 0
+
+        # Zobrist hash of the position, updated incrementally as marbles are placed and rotated
+        self._zobrist = 0
+
+    def clone(self):
+        """
+        Copies the board, a cheaper alternative to copy.deepcopy for search code
+        :return: New GameBoard with the same marbles
+        """
+        board = type(self).__new__(type(self))
+        board._white = self._white
+        board._black = self._black
+        board._occupied = self._occupied
+        board._zobrist = self._zobrist
+        return board
 
     def get_board(self):
         """
-        Retrieves the current game board
+        Retrieves the current game board as a 2D list built from the bitboards
         :return: Current game board
         """
-        return self._game_board
+        # Fill a flat list of the 36 positions, visiting only the set bits
+        cells = [EMPTY] * 36
+        for marble_color, bits in ((WHITE, self._white), (BLACK, self._black)):
+            while bits:
+                lowest_bit = bits & -bits
+                cells[lowest_bit.bit_length() - 1] = marble_color
+                bits ^= lowest_bit
+
+        # Slice the flat list into the 6 rows
+        return [cells[start:start + 6] for start in range(0, 36, 6)]
+
+    def get_bitboards(self):
+        """
+        Retrieves the white and black bitboards, e.g. as the starting point for step()
+        :return: Tuple (white, black) of bitboards with bit index row * 6 + column
+        """
+        return self._white, self._black
+
+    def get_zobrist_hash(self):
+        """
+        Retrieves the Zobrist hash of the current position, e.g. as a transposition table key
+        :return: 64-bit integer hash
+        """
+        return self._zobrist
 
     def get_sub_board(self, sub_board_num):
         """
         Retrieves the requested sub_board
         :return: The requested sub_board
         """
-        return self._sub_boards[sub_board_num].get_sub_board()
+        board = self.get_board()
+        starting_row, starting_column = SUB_BOARD_CORNERS[sub_board_num]
+        return [row[starting_column:starting_column + 3] for row in board[starting_row:starting_row + 3]]
+
+    def is_empty(self, position):
+        """
+        Checks if no marble is placed on a position
+        :param position: Tuple (row, column) representing the position on the board
+        :return: True if empty, else False
+        """
+        row, col = position
+        return not self._occupied >> (row * 6 + col) & 1
 
     def update_game_board(self, marble_color, position):
         """
@@ -249,173 +550,85 @@ class GameBoard:
         :param position: Tuple (row, column) representing the position on the board
         """
         row, col = position
-        self._game_board[row][col] = marble_color
+        index = row * 6 + col
+        bit = 1 << index
+        if marble_color == WHITE:
+            self._white |= bit
+            self._zobrist ^= ZOBRIST_KEYS[index][0]
+        else:
+            self._black |= bit
+            self._zobrist ^= ZOBRIST_KEYS[index][1]
+        self._occupied |= bit
 
     def rotate_sub_board(self, sub_board, rotation):
         """
-        Communicates with SubBoard class to rotate a specific sub-board either CW or CCW.
+        Rotates a specific sub-board either CW or CCW by moving its bits on both bitboards.
         :param sub_board: Integer representing the sub-board to be rotated (1, 2, 3, 4)
         :param rotation: String 'C' for clockwise or 'A' for counterclockwise rotation
-        """
-        # Rotate the sub-board
-        self._sub_boards[sub_board].rotate(rotation)
-
-        # Update the main board to incorporate rotated sub-board
-        self.update_board_from_sub_boards()
-
-    def update_board_from_sub_boards(self):
-        """
-        Updates the main board with the current state of sub-boards.
-        """
-        # Map the sub-board indices to the main board's corner positions
-        sub_board_map = {
-            1: (0, 0),
-            2: (0, 3),
-            3: (3, 0),
-            4: (3, 3)
-        }
-
-        # Iterate through each sub-board and update the corresponding section of the main board
-        for sub_board_num, (starting_row, starting_column) in sub_board_map.items():
-            sub_board = self._sub_boards[sub_board_num].get_sub_board()
-            for row in range(3):        # For each row in the sub-board
-                for column in range(3):     # For each column in the sub-board
-                    self._game_board[starting_row + row][starting_column + column] = sub_board[row][column]
+        :return: Tuple (white moved, black moved), True if the rotation moved that color's marbles
+        """
+        # Clear the sub-board, then set each marble at its rotated position and move its hash key
+        outside = ~SUB_BOARD_MASKS[sub_board]
+        white = self._white & outside
+        black = self._black & outside
+        zobrist = self._zobrist
+        for source, destination, white_change, black_change in SUB_BOARD_ROTATIONS[(sub_board, rotation)]:
+            if self._white & source:
+                white |= destination
+                zobrist ^= white_change
+            elif self._black & source:
+                black |= destination
+                zobrist ^= black_change
+
+        moved = (white != self._white, black != self._black)
+        self._zobrist = zobrist
+        self._white = white
+        self._black = black
+        self._occupied = white | black
+        return moved
 
     def is_full(self):
         """
         Checks if a marble is placed on every position
         :return: True if full, else False
         """
-        for row in self._game_board:
-            if '.' in row:
-                return False
-
-        return True
+        return self._occupied == FULL_MASK
 
     def check_end_conditions(self, current_player_color):
         """
-        Checks for win/loss/draw conditions and updates game state
+        Checks if a player has five marbles in a row horizontally, vertically or diagonally
         :param current_player_color: Color of the player who just made a move
-        :return: 'UNFINISHED', 'WHITE_WON', 'BLACK_WON', or 'DRAW' depending on end condition
-        """
-        def check_five_in_a_row(board, color):
-            """
-            Checks for five marbles in a row horizontally and vertically
-            :param board: The current state of the game board
-            :param color: color of the player's marble
-            :return: True if there are 5 marbles in a row, else False
-            """
-            # Check rows
-            for row in range(6):
-                for column in range(2):
-                    if (
-                            board[row][column] == color and
-                            board[row][column + 1] == color and
-                            board[row][column + 2] == color and
-                            board[row][column + 3] == color and
-                            board[row][column + 4] == color
-                    ):
-                        return True
-
-            # Check columns
-            for column in range(6):
-                for row in range(2):
-                    if (
-                            board[row][column] == color and
-                            board[row + 1][column] == color and
-                            board[row + 2][column] == color and
-                            board[row + 3][column] == color and
-                            board[row + 4][column] == color
-                    ):
-                        return True
-
-            # Check diagonals from top-left to bottom-right
-            for row in range(2):
-                for column in range(2):
-                    if (
-                            board[row][column] == color and
-                            board[row + 1][column + 1] == color and
-                            board[row + 2][column + 2] == color and
-                            board[row + 3][column + 3] == color and
-                            board[row + 4][column + 4] == color
-                    ):
-                        return True
-
-            # Check diagonals from top-right to bottom-left
-            for row in range(2):
-                for column in range(2, 6):
-                    if (
-                            board[row][column] == color and
-                            board[row + 1][column - 1] == color and
-                            board[row + 2][column - 2] == color and
-                            board[row + 3][column - 3] == color and
-                            board[row + 4][column - 4] == color
-                    ):
-                        return True
-
-            return False
-
-        # Check if the current player has won
-        if check_five_in_a_row(self._game_board, current_player_color):
-            return True
+        :return: True if the player has 5 marbles in a row, else False
+        """
+        # Check if the current player has completed any line of five
+        return has_five_in_a_row(self._white if current_player_color == WHITE else self._black)
 
-        # Game is not finished
+    def check_win_at(self, marble_color, position):
+        """
+        Checks for five in a row among the lines passing through a position
+        :param marble_color: Color of the marble placed at position
+        :param position: Tuple (row, column) of the marble that was just placed
+        :return: True if the player has 5 marbles in a row, else False
+        """
+        row, col = position
+        bits = self._white if marble_color == WHITE else self._black
+        for mask in LINES_THROUGH[row * 6 + col]:
+            if bits & mask == mask:
+                return True
         return False
 
-
-class SubBoard:
-    """
-    Represents a 3x3 sub-board.
-    Handles the rotation of the sub-board by 90 degrees.
-    Communicates the transformed positions to GameBoard class.
-    """
-    def __init__(self, main_board, start_row, start_col):
-        # Reference the main board
-        self._main_board = main_board
-        self._start_row = start_row
-        self._start_col = start_col
-
-    def get_sub_board(self):
+    def check_win_in_sub_board(self, marble_color, sub_board):
         """
-        Retrieves the current sub-board
-        :return: The current sub-board
+        Checks for five in a row among the lines passing through a sub-board
+        :param marble_color: Color of the player's marble
+        :param sub_board: Integer representing the sub-board that was rotated (1, 2, 3, 4)
+        :return: True if the player has 5 marbles in a row, else False
         """
-        sub_board = []
-        for row in range(3):
-            rows = []
-            for col in range(3):
-                rows.append(self._main_board[self._start_row + row][self._start_col + col])
-            sub_board.append(rows)
-        return sub_board
-
-    def rotate(self, rotation):
-        """
-        Rotates the sub-board by 90 degrees clockwise 'C' or counterclockwise 'A'.
-        :param rotation: String 'C' for clockwise or 'A' for counterclockwise
-        """
-        # Retrieve the current sub-board
-        sub_board = self.get_sub_board()
-
-        if rotation == 'C':
-            # Rotate 90 degrees clockwise
-            rotated_board = [
-                [sub_board[2][0], sub_board[1][0], sub_board[0][0]],
-                [sub_board[2][1], sub_board[1][1], sub_board[0][1]],
-                [sub_board[2][2], sub_board[1][2], sub_board[0][2]]
-            ]
-        elif rotation == 'A':
-            # Rotate 90 degrees counterclockwise
-            rotated_board = [
-                [sub_board[0][2], sub_board[1][2], sub_board[2][2]],
-                [sub_board[0][1], sub_board[1][1], sub_board[2][1]],
-                [sub_board[0][0], sub_board[1][0], sub_board[2][0]]
-            ]
-
-        # Update main board with rotated sub-board
-        for row in range(3):
-            for col in range(3):
-                self._main_board[self._start_row + row][self._start_col + col] = rotated_board[row][col]
+        bits = self._white if marble_color == WHITE else self._black
+        for mask in SUB_BOARD_LINES[sub_board]:
+            if bits & mask == mask:
+                return True
+        return False
 
 
 class GameLog:
@@ -424,13 +637,24 @@ class GameLog:
     Records all moves and board transformations.
     Allows review of previous game moves.
     """
+    __slots__ = ('_game_log',)
+
     def __init__(self):
-        self._game_log = []  # Stores moves made and game states
+        self._game_log = []  # Stores moves made and game states as unformatted tuples
+
+    def clone(self):
+        """
+        Copies the game log, later entries are not shared with the original
+        :return: New GameLog with the same entries
+        """
+        game_log = type(self).__new__(type(self))
+        game_log._game_log = list(self._game_log)
+        return game_log
 
     def get_game_log(self):
         """
         Retrieves the game log of previous moves and game states
-        :return: Game log of previous moves and game states
+        :return: Game log of (marble_color, position, sub_board, rotation) moves and (game_state,) states
         """
         return self._game_log
 
@@ -442,11 +666,8 @@ class GameLog:
         :param sub_board: Integer representing the sub-board to be rotated (1, 2, 3, 4)
         :param rotation: String 'C' for clockwise or 'A' for counterclockwise rotation
         """
-        # Converts rotation abbreviation to full word
-        rotation_converted = "Clockwise" if rotation == "C" else "A"
-
-        # Logs the move
-        self._game_log.append(f"{marble_color} was placed on {position}, sub-board {sub_board} was rotated {rotation_converted}")
+        # Logs the move, formatting is deferred to review_log
+        self._game_log.append((marble_color, position, sub_board, rotation))
 
     def log_game_state(self, game_state):
         """
@@ -454,14 +675,21 @@ class GameLog:
         :param game_state: Current game state
         :return:
         """
-        self._game_log.append(f"Game State: {game_state}")
+        self._game_log.append((game_state,))
 
     def review_log(self):
         """
         Reviews the log of all moves made in the game.
         """
         for entry in self._game_log:
-            print(entry)
+            if len(entry) == 1:
+                print(f"Game State: {entry[0]}")
+            else:
+                marble_color, position, sub_board, rotation = entry
+
+                # Converts rotation abbreviation to full word
+                rotation_converted = "Clockwise" if rotation == "C" else "Anticlockwise"
+                print(f"{marble_color} was placed on {position}, sub-board {sub_board} was rotated {rotation_converted}")
 
 
 def main():
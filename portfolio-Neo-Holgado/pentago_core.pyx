@@ -0,0 +1,130 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# Author: Neo Holgado
+# GitHub Username: Neo-Holgado
+# Description: Compiled version of the Pentago bitboard move kernel step().
+#              Only used by search code through Pentago.load_step_kernel(),
+#              the Pentago class itself never calls it.
+#              The line masks and rotation permutations are copied from the tables
+#              in Pentago.py at import, so the move rules are only defined there.
+#              Build with: python setup.py build_ext --inplace
+
+from libc.stdint cimport uint64_t
+
+from Pentago import FULL_MASK as BOARD_FULL_MASK, KERNEL_ROTATIONS, WIN_MASKS as BOARD_WIN_MASKS
+
+# Bits of all 36 positions, the occupied bits of a full board
+cdef uint64_t FULL_MASK = BOARD_FULL_MASK
+
+# All 32 lines of five on the board, bit index row * 6 + column
+cdef uint64_t WIN_MASKS[32]
+
+# Source and destination bits of each rotation, indexed like KERNEL_ROTATIONS
+cdef uint64_t ROTATION_SOURCES[8][9]
+cdef uint64_t ROTATION_DESTINATIONS[8][9]
+
+
+cdef void load_tables() except *:
+    """
+    Copies WIN_MASKS and KERNEL_ROTATIONS from Pentago.py into the C arrays
+    """
+    cdef int index, position
+    if len(BOARD_WIN_MASKS) != 32 or len(KERNEL_ROTATIONS) != 8:
+        raise ValueError("Pentago.py tables do not match the compiled kernel sizes")
+    for index in range(32):
+        WIN_MASKS[index] = BOARD_WIN_MASKS[index]
+    for index in range(8):
+        for position in range(9):
+            ROTATION_SOURCES[index][position] = KERNEL_ROTATIONS[index][position][0]
+            ROTATION_DESTINATIONS[index][position] = KERNEL_ROTATIONS[index][position][1]
+
+
+load_tables()
+
+
+def get_tables():
+    """
+    Retrieves the tables the kernel uses, for checking them against Pentago.py
+    :return: Tuple (full mask, win masks, rotations) in the layout of FULL_MASK, WIN_MASKS and KERNEL_ROTATIONS
+    """
+    win_masks = tuple(WIN_MASKS[index] for index in range(32))
+    rotations = tuple(
+        tuple((ROTATION_SOURCES[index][position], ROTATION_DESTINATIONS[index][position]) for position in range(9))
+        for index in range(8)
+    )
+    return FULL_MASK, win_masks, rotations
+
+
+cdef inline bint has_five_in_a_row(uint64_t bits) nogil:
+    """
+    Checks a bitboard against every line of five
+    """
+    cdef int i
+    for i in range(32):
+        if (bits & WIN_MASKS[i]) == WIN_MASKS[i]:
+            return True
+    return False
+
+
+cdef inline uint64_t rotate_bits(uint64_t bits, int sub_board, int rotation) nogil:
+    """
+    Rotates one sub-board of a bitboard by 90 degrees, rotation 0 for clockwise or 1 for counterclockwise
+    """
+    cdef int index = (sub_board - 1) * 2 + rotation
+    cdef int position
+    cdef uint64_t rotated = bits
+
+    # Clear the sub-board, then set each marble at its rotated position
+    for position in range(9):
+        rotated &= ~ROTATION_SOURCES[index][position]
+    for position in range(9):
+        if bits & ROTATION_SOURCES[index][position]:
+            rotated |= ROTATION_DESTINATIONS[index][position]
+    return rotated
+
+
+cpdef (uint64_t, uint64_t, int) step(uint64_t white, uint64_t black, int side, int move_index,
+                                     int sub_board, int rotation):
+    """
+    Plays one move on a pair of bitboards, for search and self-play loops.
+    The move is not validated, the game must be unfinished and the position at move_index empty.
+    :param white: Bitboard of the white marbles
+    :param black: Bitboard of the black marbles
+    :param side: Integer 0 for white or 1 for black
+    :param move_index: Bit index row * 6 + column of the marble to place
+    :param sub_board: Integer representing the sub-board to be rotated (1, 2, 3, 4)
+    :param rotation: Integer 0 for clockwise or 1 for counterclockwise rotation
+    :return: Tuple (white, black, state) where state indexes GAME_STATES in Pentago.py
+    """
+    cdef uint64_t rotated_white, rotated_black
+    cdef bint white_win, black_win
+
+    # Place the marble and check for a win before rotating
+    if side == 0:
+        white |= <uint64_t>1 << move_index
+        if has_five_in_a_row(white):
+            return white, black, 1
+    else:
+        black |= <uint64_t>1 << move_index
+        if has_five_in_a_row(black):
+            return white, black, 2
+
+    # Rotate the sub-board on both bitboards
+    rotated_white = rotate_bits(white, sub_board, rotation)
+    rotated_black = rotate_bits(black, sub_board, rotation)
+
+    # Check for wins after rotating, a color without moved marbles cannot have a new line
+    white_win = rotated_white != white and has_five_in_a_row(rotated_white)
+    black_win = rotated_black != black and has_five_in_a_row(rotated_black)
+    white = rotated_white
+    black = rotated_black
+
+    # Check for both players winning, then for a full board
+    if white_win and black_win:
+        return white, black, 3
+    if white_win:
+        return white, black, 1
+    if black_win:
+        return white, black, 2
+    if (white | black) == FULL_MASK:
+        return white, black, 3
+    return white, black, 0
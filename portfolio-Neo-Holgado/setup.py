@@ -0,0 +1,12 @@
+# Author: Neo Holgado
+# GitHub Username: Neo-Holgado
+# Description: Builds the optional compiled move kernel returned by Pentago.load_step_kernel()
+#              Build in place with: python setup.py build_ext --inplace
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="pentago-core",
+    ext_modules=cythonize("pentago_core.pyx"),
+)
@@ -0,0 +1,167 @@
+# Author: Neo Holgado
+# GitHub Username: Neo-Holgado
+# Description: Checks the step() bitboard kernels against Pentago.make_move,
+#              and the incremental board state kept by GameBoard
+#              Run with: python -m unittest test_pentago
+
+import random
+import types
+import unittest
+
+import Pentago
+
+try:
+    import pentago_core
+except ImportError:
+    pentago_core = None
+
+# Module kernel functions as imported, before any kernel has been loaded
+PURE_KERNEL = (Pentago.has_five_in_a_row, Pentago.rotate_bits, Pentago.step)
+
+
+class KernelTestCase(unittest.TestCase):
+    """
+    Plays random games through make_move and a step() kernel side by side,
+    so the kernel copies of the move rules cannot drift from the Pentago class.
+    """
+    def assert_kernel_matches_make_move(self, kernel, games=500):
+        """
+        Plays random games and compares the kernel with make_move after every move
+        :param kernel: step function to check
+        :param games: Number of games to play
+        """
+        generator = random.Random(162)
+        for _ in range(games):
+            game = Pentago.Pentago()
+            side = 1        # Black plays first
+            while game.get_game_state() == 'UNFINISHED':
+                white, black = game.get_bitboards()
+                empty = [index for index in range(36) if not (white | black) >> index & 1]
+                move_index = generator.choice(empty)
+                sub_board = generator.randrange(1, 5)
+                rotation = generator.randrange(2)
+
+                result = kernel(white, black, side, move_index, sub_board, rotation)
+                position = 'abcdef'[move_index // 6] + str(move_index % 6)
+                self.assertIs(game.make_move(('white', 'black')[side], position, sub_board, 'CA'[rotation]), True)
+
+                self.assertEqual((result[0], result[1]), game.get_bitboards())
+                self.assertEqual(Pentago.GAME_STATES[result[2]], game.get_game_state())
+                side ^= 1
+
+
+class TestStepKernel(KernelTestCase):
+    """
+    Checks the pure Python and loaded step() kernels.
+    """
+    def test_step_matches_make_move(self):
+        self.assert_kernel_matches_make_move(Pentago.step)
+
+    def test_loaded_kernel_matches_make_move(self):
+        # Covers the Cython or numba kernel when one is available
+        self.assert_kernel_matches_make_move(Pentago.load_step_kernel())
+
+    def test_loading_kernel_keeps_module_functions_pure(self):
+        Pentago.load_step_kernel()
+        self.assertEqual((Pentago.has_five_in_a_row, Pentago.rotate_bits, Pentago.step), PURE_KERNEL)
+        for function in PURE_KERNEL:
+            self.assertIsInstance(function, types.FunctionType)
+
+
+
+def recompute_zobrist_hash(white, black):
+    """
+    Computes the Zobrist hash of a pair of bitboards from scratch
+    """
+    zobrist = 0
+    for index in range(36):
+        if white >> index & 1:
+            zobrist ^= Pentago.ZOBRIST_KEYS[index][0]
+        if black >> index & 1:
+            zobrist ^= Pentago.ZOBRIST_KEYS[index][1]
+    return zobrist
+
+
+class TestZobristHash(unittest.TestCase):
+    """
+    Checks the incrementally maintained hash against a full recomputation.
+    """
+    def test_hash_matches_recomputation_after_placements_and_rotations(self):
+        generator = random.Random(36)
+        for _ in range(200):
+            board = Pentago.GameBoard()
+            for turn in range(36):
+                empty = [(row, column) for row in range(6) for column in range(6) if board.is_empty((row, column))]
+                board.update_game_board(Pentago.PLAYERS[turn % 2], generator.choice(empty))
+                self.assertEqual(board.get_zobrist_hash(), recompute_zobrist_hash(*board.get_bitboards()))
+                board.rotate_sub_board(generator.randrange(1, 5), generator.choice('CA'))
+                self.assertEqual(board.get_zobrist_hash(), recompute_zobrist_hash(*board.get_bitboards()))
+
+    def test_game_hash_matches_recomputation(self):
+        generator = random.Random(15)
+        for _ in range(200):
+            game = Pentago.Pentago()
+            side = 1
+            while game.get_game_state() == 'UNFINISHED':
+                white, black = game.get_bitboards()
+                move_index = generator.choice([index for index in range(36) if not (white | black) >> index & 1])
+                position = 'abcdef'[move_index // 6] + str(move_index % 6)
+                game.make_move(('white', 'black')[side], position, generator.randrange(1, 5), generator.choice('CA'))
+                self.assertEqual(game.get_zobrist_hash(), recompute_zobrist_hash(*game.get_bitboards()))
+                side ^= 1
+
+
+class TestClone(unittest.TestCase):
+    """
+    Checks that a cloned game matches the original and then evolves independently.
+    """
+    def test_clone_matches_and_is_independent(self):
+        game = Pentago.Pentago()
+        for move in (('black', 'a0', 1, 'C'), ('white', 'b4', 2, 'A'), ('black', 'e2', 3, 'C')):
+            game.make_move(*move)
+        clone = game.clone()
+
+        self.assertIsInstance(clone, Pentago.Pentago)
+        self.assertEqual(clone.get_bitboards(), game.get_bitboards())
+        self.assertEqual(clone.get_zobrist_hash(), game.get_zobrist_hash())
+        self.assertEqual(clone.get_current_player(), game.get_current_player())
+        self.assertEqual(clone.get_game_state(), game.get_game_state())
+
+        bitboards = game.get_bitboards()
+        zobrist = game.get_zobrist_hash()
+        self.assertIs(clone.make_move('white', 'f5', 4, 'A'), True)
+
+        self.assertEqual(game.get_bitboards(), bitboards)
+        self.assertEqual(game.get_zobrist_hash(), zobrist)
+        self.assertEqual(game.get_current_player(), 'W')
+        self.assertEqual(clone.get_current_player(), 'B')
+        self.assertNotEqual(clone.get_bitboards(), bitboards)
+
+        # The original can still play the move the clone made
+        self.assertIs(game.make_move('white', 'f5', 4, 'A'), True)
+        self.assertEqual(game.get_bitboards(), clone.get_bitboards())
+        self.assertEqual(game.get_zobrist_hash(), clone.get_zobrist_hash())
+
+    def test_game_log_clone_is_independent(self):
+        game_log = Pentago.GameLog()
+        game_log.log_move('black', 'a0', 1, 'C')
+        clone = game_log.clone()
+        clone.log_move('white', 'b4', 2, 'A')
+        self.assertEqual(game_log.get_game_log(), [('black', 'a0', 1, 'C')])
+        self.assertEqual(len(clone.get_game_log()), 2)
+
+
+@unittest.skipUnless(pentago_core, "pentago_core is not built, see setup.py")
+class TestCompiledKernel(KernelTestCase):
+    """
+    Checks the Cython kernel against the tables and move rules in Pentago.py.
+    """
+    def test_compiled_tables_match(self):
+        self.assertEqual(pentago_core.get_tables(), (Pentago.FULL_MASK, Pentago.WIN_MASKS, Pentago.KERNEL_ROTATIONS))
+
+    def test_compiled_step_matches_make_move(self):
+        self.assert_kernel_matches_make_move(pentago_core.step)
+
+
+if __name__ == '__main__':
+    unittest.main()